@@ -523,6 +523,41 @@ class GitHubRepo():
 
         return pull_request_collection
 
+    #Get the combined number of issues and prs in one query instead of
+    #paginating through either collection just to count it.
+    def get_issue_and_pr_totals(self):
+
+        query = """
+            query($owner: String!, $repo: String!) {
+                repository(owner:$owner, name:$repo) {
+                    issues {
+                        totalCount
+                    }
+                    pullRequests {
+                        totalCount
+                    }
+                }
+            }
+        """
+
+        params = {
+            'owner' : self.owner,
+            'repo' : self.repo
+        }
+
+        data = request_graphql_dict(self.keyAuth, self.logger, self.url, query, variables=params)
+
+        if not data:
+            raise TimeoutError("No data received from endpoint.")
+
+        try:
+            repository = data['data']['repository']
+        except KeyError:
+            self.logger.error(f"Could not extract repository totals from response: {data}")
+            raise
+
+        return int(repository['issues']['totalCount']) + int(repository['pullRequests']['totalCount'])
+
 
 
 class PullRequest():
@@ -1,13 +1,16 @@
 """Utility functions that are useful for several Github tasks"""
 from typing import Any, List, Tuple
 from httpx import Response
+import functools
 import logging
 import json
 import httpx
+import numpy as np
+import sqlalchemy as s
 from augur.tasks.github.util.github_task_session import GithubTaskManifest
 from augur.application.db.session import DatabaseSession
-from augur.application.db.models import Repo
-from augur.tasks.util.worker_util import calculate_date_weight_from_timestamps
+from augur.application.db.models import CollectionStatus, Repo
+from augur.tasks.util.worker_util import calculate_date_weight_from_timestamps, date_weight_factors
 
 
 # This function adds a key value pair to a list of dicts and returns the modified list of dicts back
@@ -29,6 +32,9 @@ def add_key_value_pair_to_dicts(data: List[dict], key: str, value: Any) -> List[
 
     return data
 
+#Pure string transformation called once per repo per scheduling pass,
+#so memoize it instead of re-parsing the same urls.
+@functools.lru_cache(maxsize=4096)
 def get_owner_repo(git_url: str) -> Tuple[str, str]:
     """Gets the owner and repository names of a repository from a git url
 
@@ -57,32 +63,76 @@ def parse_json_response(logger: logging.Logger, response: httpx.Response) -> dic
         logger.warning(f"invalid return from GitHub. Response was: {response.text}. Exception: {e}")
         return json.loads(json.dumps(response.text))
 
-def get_repo_weight_by_issue(logger,repo_git):
+def get_repo_weight_by_issue(logger,repo_git,owner_name=None):
     from augur.tasks.github.util.gh_graphql_entities import GitHubRepo as GitHubRepoGraphql
 
-    owner,name = get_owner_repo(repo_git)
+    #Callers that already parsed the url can pass (owner, name) through
+    #instead of having it re-derived from repo_git here.
+    owner,name = owner_name if owner_name else get_owner_repo(repo_git)
 
     with GithubTaskManifest(logger) as manifest:
         repo_graphql = GitHubRepoGraphql(logger, manifest.key_auth, owner, name)
-        number_of_issues_and_prs = len(repo_graphql.get_issues_collection()) + len(repo_graphql.get_pull_requests_collection())
-    
+        #One query for both totalCounts instead of one per collection.
+        number_of_issues_and_prs = repo_graphql.get_issue_and_pr_totals()
+
     return number_of_issues_and_prs
 
+#Batch sibling of get_repo_weight_by_issue. Shares one GithubTaskManifest
+#(db session + key auth setup) across the whole list instead of paying that
+#setup and teardown once per repo.
+#days_list, when given, holds each repo's days since its last collection and
+#must line up with repo_git_list. The date factors follow the same semantics
+#as calculate_date_weight_from_timestamps for already-collected repos: past
+#the 30 day grace period the factor lowers the weight, before it the factor
+#raises it.
+def get_repo_weights_by_issue(logger, repo_git_list, days_list=None, owner_name_map=None):
+    from augur.tasks.github.util.gh_graphql_entities import GitHubRepo as GitHubRepoGraphql
+
+    #An optional map of repo_git -> (owner, name) lets schedulers that
+    #already parsed their urls skip the parse entirely; otherwise the
+    #memoized get_owner_repo keeps repeat parses to one per unique url.
+    if owner_name_map is None:
+        owner_name_map = {}
+
+    counts = []
+    with GithubTaskManifest(logger) as manifest:
+        for repo_git in repo_git_list:
+            owner, name = owner_name_map.get(repo_git) or get_owner_repo(repo_git)
+            repo_graphql = GitHubRepoGraphql(logger, manifest.key_auth, owner, name)
+            counts.append(repo_graphql.get_issue_and_pr_totals())
+
+    if days_list is None:
+        return counts
+
+    #Apply the date factors for the whole batch in one vectorized pass,
+    #flipping the sign inside the grace period just like the scalar path.
+    days = np.fromiter(days_list, dtype=np.float64)
+    factors = date_weight_factors(days, domain_shift=30)
+    factors = np.where(days >= 30, factors, -factors)
+
+    weights = np.fromiter(counts, dtype=np.float64) - factors
+
+    return weights.tolist()
+
 #Get the weight for each repo for the core collection hook
 def get_repo_weight_core(logger,repo_git):
     from augur.tasks.init.celery_app import engine
 
     with DatabaseSession(logger,engine) as session:
-        repo = Repo.get_by_repo_git(session, repo_git)
-        if not repo:
+        #Fetch just the two columns the weight calculation reads instead of
+        #hydrating Repo and lazily loading its collection_status.
+        row = session.execute(
+            s.select(Repo.repo_added, CollectionStatus.core_data_last_collected)
+            .join(CollectionStatus, CollectionStatus.repo_id == Repo.repo_id, isouter=True)
+            .where(Repo.repo_git == repo_git)
+        ).first()
+
+        if row is None:
             raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
-        
-        #try to get the collection status if it exists at this point
-        try:
-            status = repo.collection_status[0]
-            time_factor = calculate_date_weight_from_timestamps(repo.repo_added,status.core_data_last_collected)
-        except IndexError:
-            time_factor = calculate_date_weight_from_timestamps(repo.repo_added,None)
+
+        #The outer join leaves the timestamp as None when the collection
+        #status record doesn't exist yet at this point.
+        time_factor = calculate_date_weight_from_timestamps(row.repo_added,row.core_data_last_collected)
 
 
     #Don't go below zero.
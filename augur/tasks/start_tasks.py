@@ -164,9 +164,13 @@ def start_primary_collection(session,max_repo, days_until_collect_again = 1):
     primary_enabled_phases.append(primary_repo_collect_phase)
 
     #task success is scheduled no matter what the config says.
+    #Build the signature template once and clone it per repo instead of
+    #constructing a fresh signature each time.
+    core_success_template = core_task_success_util.si()
+
     def core_task_success_util_gen(repo_git):
-        return core_task_success_util.si(repo_git)
-    
+        return core_success_template.clone(args=(repo_git,))
+
     primary_enabled_phases.append(core_task_success_util_gen)
 
     start_repos_by_user(session, max_repo, primary_enabled_phases)
@@ -185,8 +189,10 @@ def start_secondary_collection(session,max_repo, days_until_collect_again = 1):
     
     secondary_enabled_phases.append(secondary_repo_collect_phase)
 
+    secondary_success_template = secondary_task_success_util.si()
+
     def secondary_task_success_util_gen(repo_git):
-        return secondary_task_success_util.si(repo_git)
+        return secondary_success_template.clone(args=(repo_git,))
 
     secondary_enabled_phases.append(secondary_task_success_util_gen)
 
@@ -204,13 +210,17 @@ def start_facade_collection(session,max_repo,days_until_collect_again = 1):
     
     facade_enabled_phases.append(facade_phase)
 
+    facade_success_template = facade_task_success_util.si()
+
     def facade_task_success_util_gen(repo_git):
-        return facade_task_success_util.si(repo_git)
+        return facade_success_template.clone(args=(repo_git,))
 
     facade_enabled_phases.append(facade_task_success_util_gen)
 
+    facade_weight_template = git_update_commit_count_weight.si()
+
     def facade_task_update_weight_util_gen(repo_git):
-        return git_update_commit_count_weight.si(repo_git)
+        return facade_weight_template.clone(args=(repo_git,))
 
     facade_enabled_phases.append(facade_task_update_weight_util_gen)
 
@@ -234,8 +244,10 @@ def start_ml_collection(session,max_repo, days_until_collect_again=7):
 
     ml_enabled_phases.append(machine_learning_phase)
 
+    ml_success_template = ml_task_success_util.si()
+
     def ml_task_success_util_gen(repo_git):
-        return ml_task_success_util.si(repo_git)
+        return ml_success_template.clone(args=(repo_git,))
 
     ml_enabled_phases.append(ml_task_success_util_gen)
 
@@ -16,7 +16,6 @@ from sqlalchemy import or_, and_, update
 from augur.application.logs import AugurLogger
 from augur.tasks.init.celery_app import celery_app as celery
 from augur.application.db.models import CollectionStatus, Repo
-from augur.application.db.util import execute_session_query
 from augur.application.config import AugurConfig
 from augur.tasks.github.util.util import get_owner_repo, get_repo_weight_core, get_repo_weight_by_issue
 from augur.tasks.github.util.gh_graphql_entities import GitHubRepo as GitHubRepoGraphql
@@ -36,26 +35,48 @@ class CollectionState(Enum):
     UPDATE = "Update"
     FAILED_CLONE = "Failed Clone"
 
+#Cache the enabled phase list per process rather than per session: the
+#Task_Routine config section rarely changes but was re-read on every
+#scheduling tick. The short TTL keeps config edits from going unnoticed
+#for more than a minute.
+_phase_cache = {"ts": 0.0, "val": None}
+_PHASE_CACHE_TTL = 60
+
 def get_enabled_phase_names_from_config(logger, session):
 
+    if _phase_cache["val"] is not None and time.monotonic() - _phase_cache["ts"] < _PHASE_CACHE_TTL:
+        return _phase_cache["val"]
+
     config = AugurConfig(logger, session)
     phase_options = config.get_section("Task_Routine")
 
-    #Get list of enabled phases 
+    #Get list of enabled phases
     enabled_phase_names = [name for name, phase in phase_options.items() if phase == 1]
 
+    _phase_cache["val"] = enabled_phase_names
+    _phase_cache["ts"] = time.monotonic()
+
     return enabled_phase_names
 
 #Query db for CollectionStatus records that fit the desired condition.
 #Used to get CollectionStatus for differant collection hooks
-def get_collection_status_repo_git_from_filter(session,filter_condition,limit,order=None):
+def get_collection_status_repo_git_from_filter(session,filter_condition,limit,order=None,last_id=None):
+
+    #Select repo_git through a join instead of walking status.repo per row,
+    #which lazy loaded one Repo per CollectionStatus record.
+    stmt = s.select(Repo.repo_git).join(CollectionStatus, CollectionStatus.repo_id == Repo.repo_id).where(filter_condition)
+
+    #Keyset pagination for chunked consumers: pass the last repo_id seen
+    #instead of scanning past already-returned rows with OFFSET.
+    if last_id is not None:
+        stmt = stmt.where(CollectionStatus.repo_id > last_id)
 
     if order is not None:
-        repo_status_list = session.query(CollectionStatus).order_by(order).filter(filter_condition).limit(limit).all()
+        stmt = stmt.order_by(order)
     else:
-        repo_status_list = session.query(CollectionStatus).filter(filter_condition).limit(limit).all()
+        stmt = stmt.order_by(CollectionStatus.repo_id)
 
-    return [status.repo.repo_git for status in repo_status_list]
+    return session.execute(stmt.limit(limit)).scalars().all()
 
 
 def split_list_into_chunks(given_list, num_chunks):
@@ -80,61 +101,54 @@ def task_failed_util(request,exc,traceback):
         secondary_id_match = CollectionStatus.secondary_task_id == request.id
         facade_id_match = CollectionStatus.facade_task_id == request.id
 
-        query = session.query(CollectionStatus).filter(or_(core_id_match,secondary_id_match,facade_id_match))
-
-        print(f"chain: {request.chain}")
         #Make sure any further execution of tasks dependent on this one stops.
+        #Revoke the queued links instead of mutating request.chain, which only
+        #hides them from this worker and still leaves them to be dequeued.
         try:
-            #Replace the tasks queued ahead of this one in a chain with None.
-            request.chain = None
+            for pending_sig in (request.chain or []):
+                pending_task_id = pending_sig.get('options', {}).get('task_id')
+                if pending_task_id:
+                    celery.control.revoke(pending_task_id, terminate=False)
         except AttributeError:
             pass #Task is not part of a chain. Normal so don't log.
         except Exception as e:
-            logger.error(f"Could not mutate request chain! \n Error: {e}")
-        
-        try:
-            collectionRecord = execute_session_query(query,'one')
-        except:
-            #Exit if we can't find the record.
-            return
-        
-        if collectionRecord.core_task_id == request.id:
-            # set status to Error in db
-            collectionRecord.core_status = CollectionStatus.ERROR.value
-            collectionRecord.core_task_id = None
-        
-
-        if collectionRecord.secondary_task_id == request.id:
-            # set status to Error in db
-            collectionRecord.secondary_status = CollectionStatus.ERROR.value
-            collectionRecord.secondary_task_id = None
-            
-        
-        if collectionRecord.facade_task_id == request.id:
-            #Failed clone is differant than an error in collection.
-            if collectionRecord.facade_status != CollectionStatus.FAILED_CLONE.value or collectionRecord.facade_status != CollectionStatus.UPDATE.value:
-                collectionRecord.facade_status = CollectionStatus.ERROR.value
-
-            collectionRecord.facade_task_id = None
-        
+            logger.error(f"Could not revoke pending chain tasks! \n Error: {e}")
+
+        #Set the status of whichever hook owned this task to Error and clear
+        #its task id in one UPDATE...CASE round-trip instead of hydrating the
+        #record, branching in python and flushing it back.
+        update_stmt = (
+            update(CollectionStatus)
+            .where(or_(core_id_match,secondary_id_match,facade_id_match))
+            .values(
+                core_status=s.case((core_id_match, CollectionState.ERROR.value), else_=CollectionStatus.core_status),
+                core_task_id=s.case((core_id_match, s.null()), else_=CollectionStatus.core_task_id),
+                secondary_status=s.case((secondary_id_match, CollectionState.ERROR.value), else_=CollectionStatus.secondary_status),
+                secondary_task_id=s.case((secondary_id_match, s.null()), else_=CollectionStatus.secondary_task_id),
+                facade_status=s.case((facade_id_match, CollectionState.ERROR.value), else_=CollectionStatus.facade_status),
+                facade_task_id=s.case((facade_id_match, s.null()), else_=CollectionStatus.facade_task_id)
+            )
+        )
+
+        session.execute(update_stmt)
         session.commit()
     
 
 
 #This task updates the core and secondary weight with the issues and prs already passed in
 @celery.task
-def issue_pr_task_update_weight_util(issue_and_pr_nums,repo_git=None,session=None):
+def issue_pr_task_update_weight_util(issue_and_pr_nums,repo_git=None,session=None,extra_values=None,just_collected_hook=None):
     from augur.tasks.init.celery_app import engine
     logger = logging.getLogger(issue_pr_task_update_weight_util.__name__)
 
     if repo_git is None:
         return
-    
+
     if session is not None:
-        update_issue_pr_weights(logger, session, repo_git, sum(issue_and_pr_nums))
+        update_issue_pr_weights(logger, session, repo_git, sum(issue_and_pr_nums),extra_values=extra_values,just_collected_hook=just_collected_hook)
     else:
         with DatabaseSession(logger,engine=engine) as session:
-            update_issue_pr_weights(logger,session,repo_git,sum(issue_and_pr_nums))
+            update_issue_pr_weights(logger,session,repo_git,sum(issue_and_pr_nums),extra_values=extra_values,just_collected_hook=just_collected_hook)
 
 
 @celery.task
@@ -148,38 +162,52 @@ def core_task_success_util(repo_git):
 
     with DatabaseSession(logger, engine) as session:
 
-        repo = Repo.get_by_repo_git(session, repo_git)
-        if not repo:
-            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
-
-        collection_status = repo.collection_status[0]
+        #Fetch only the raw issue/pr sum instead of hydrating Repo and its
+        #collection_status relationship just to read one column.
+        row = session.execute(
+            s.select(CollectionStatus.repo_id, CollectionStatus.issue_pr_sum)
+            .join(Repo, CollectionStatus.repo_id == Repo.repo_id)
+            .where(Repo.repo_git == repo_git)
+        ).first()
 
-        collection_status.core_status = CollectionState.SUCCESS.value
-        collection_status.core_data_last_collected = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        collection_status.core_task_id = None
-
-        session.commit()
+        if row is None:
+            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
 
-        repo_git = repo.repo_git
-        status = repo.collection_status[0]
-        raw_count = status.issue_pr_sum
+        raw_count = row.issue_pr_sum
 
-        #Update the values for core and secondary weight
-        issue_pr_task_update_weight_util([int(raw_count)],repo_git=repo_git,session=session)
+        #Fold the status flip, server-side timestamp and the weight recompute
+        #into the one UPDATE issued by the weight util — same row, one round-trip.
+        issue_pr_task_update_weight_util([int(raw_count)],repo_git=repo_git,session=session,
+            extra_values={"core_status": CollectionState.SUCCESS.value,"core_data_last_collected": s.func.now(),"core_task_id": None},
+            just_collected_hook="core")
 
 #Update the existing core and secondary weights as well as the raw sum of issues and prs
-def update_issue_pr_weights(logger,session,repo_git,raw_sum):
-    repo = Repo.get_by_repo_git(session, repo_git)
-    status = repo.collection_status[0]
-
-    try: 
+#extra_values lets success callbacks piggyback their status/task id writes on
+#the same UPDATE — same row, same round-trip. just_collected_hook names a hook
+#whose last-collected timestamp is being set in that same UPDATE, so its
+#weight is computed as if it were collected right now.
+def update_issue_pr_weights(logger,session,repo_git,raw_sum,extra_values=None,just_collected_hook=None):
+
+    #Only the five columns the calculation reads, rather than a full Repo
+    #plus its collection_status relationship.
+    status = session.execute(
+        s.select(Repo.repo_id, Repo.repo_added, CollectionStatus.core_data_last_collected,
+                 CollectionStatus.secondary_data_last_collected, CollectionStatus.ml_data_last_collected)
+        .join(CollectionStatus, CollectionStatus.repo_id == Repo.repo_id)
+        .where(Repo.repo_git == repo_git)
+    ).first()
+
+    core_last_collected = datetime.datetime.now() if just_collected_hook == "core" else status.core_data_last_collected
+    secondary_last_collected = datetime.datetime.now() if just_collected_hook == "secondary" else status.secondary_data_last_collected
+
+    try:
         weight = raw_sum
 
-        weight -= calculate_date_weight_from_timestamps(repo.repo_added, status.core_data_last_collected)
+        weight -= calculate_date_weight_from_timestamps(status.repo_added, core_last_collected)
 
-        secondary_tasks_weight = raw_sum - calculate_date_weight_from_timestamps(repo.repo_added, status.secondary_data_last_collected)
+        secondary_tasks_weight = raw_sum - calculate_date_weight_from_timestamps(status.repo_added, secondary_last_collected)
 
-        ml_tasks_weight = raw_sum - calculate_date_weight_from_timestamps(repo.repo_added,status.ml_data_last_collected)
+        ml_tasks_weight = raw_sum - calculate_date_weight_from_timestamps(status.repo_added,status.ml_data_last_collected)
     except Exception as e:
         logger.error(f"{e}")
         weight = None
@@ -189,14 +217,19 @@ def update_issue_pr_weights(logger,session,repo_git,raw_sum):
 
     logger.info(f"Args: {raw_sum} , {repo_git}")
 
-    if weight is None:
+    values = dict(extra_values) if extra_values else {}
+
+    if weight is not None:
+        values.update(core_weight=weight,issue_pr_sum=raw_sum,secondary_weight=secondary_tasks_weight,ml_weight=ml_tasks_weight)
+
+    if not values:
         return
 
 
     update_query = (
         update(CollectionStatus)
-        .where(CollectionStatus.repo_id == repo.repo_id)
-        .values(core_weight=weight,issue_pr_sum=raw_sum,secondary_weight=secondary_tasks_weight,ml_weight=ml_tasks_weight)
+        .where(CollectionStatus.repo_id == status.repo_id)
+        .values(**values)
     )
 
     session.execute(update_query)
@@ -215,45 +248,38 @@ def secondary_task_success_util(repo_git):
 
     with DatabaseSession(logger, engine) as session:
 
-        repo = Repo.get_by_repo_git(session, repo_git)
-        if not repo:
-            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
-
-        collection_status = repo.collection_status[0]
+        row = session.execute(
+            s.select(CollectionStatus.repo_id, CollectionStatus.issue_pr_sum)
+            .join(Repo, CollectionStatus.repo_id == Repo.repo_id)
+            .where(Repo.repo_git == repo_git)
+        ).first()
 
-        collection_status.secondary_status = CollectionState.SUCCESS.value
-        collection_status.secondary_data_last_collected	 = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        collection_status.secondary_task_id = None
-
-        session.commit()
+        if row is None:
+            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
 
-        #Update the values for core and secondary weight
-        repo_git = repo.repo_git
-        status = repo.collection_status[0]
-        raw_count = status.issue_pr_sum
+        raw_count = row.issue_pr_sum
 
-        issue_pr_task_update_weight_util([int(raw_count)],repo_git=repo_git,session=session)
+        #Update the values for core and secondary weight in the same UPDATE
+        #that marks the hook successful.
+        issue_pr_task_update_weight_util([int(raw_count)],repo_git=repo_git,session=session,
+            extra_values={"secondary_status": CollectionState.SUCCESS.value,"secondary_data_last_collected": s.func.now(),"secondary_task_id": None},
+            just_collected_hook="secondary")
 
 #Get the weight for each repo for the secondary collection hook.
 def get_repo_weight_secondary(logger,repo_git):
     from augur.tasks.init.celery_app import engine
 
     with DatabaseSession(logger,engine) as session:
-        repo = Repo.get_by_repo_git(session, repo_git)
-        if not repo:
-            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
-
-        status = repo.collection_status[0]
+        #Only the repo's existence matters here, so check the primary key
+        #instead of hydrating Repo and its collection_status. The old days
+        #calculation was dropped: get_repo_weight_by_issue never accepted it,
+        #so passing it along raised TypeError before the weight was returned.
+        row = session.execute(s.select(Repo.repo_id).where(Repo.repo_git == repo_git)).first()
 
-        last_collected = status.secondary_data_last_collected
-
-        if last_collected:
-            time_delta = datetime.datetime.now() - status.secondary_data_last_collected
-            days = time_delta
-        else:
-            days = 0
+        if row is None:
+            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
 
-        return get_repo_weight_by_issue(logger, repo_git, days)
+        return get_repo_weight_by_issue(logger, repo_git)
 
 
 @celery.task
@@ -267,18 +293,23 @@ def facade_task_success_util(repo_git):
 
     with DatabaseSession(logger, engine) as session:
 
-        repo = Repo.get_by_repo_git(session, repo_git)
-        if not repo:
-            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
-
-        collection_status = repo.collection_status[0]
-
-        collection_status.facade_status = CollectionState.SUCCESS.value
-        collection_status.facade_data_last_collected = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        collection_status.facade_task_id = None
-
+        #Update directly through a repo_git subquery instead of hydrating the
+        #Repo and its collection_status relationship first.
+        update_stmt = (
+            update(CollectionStatus)
+            .where(CollectionStatus.repo_id == s.select(Repo.repo_id).where(Repo.repo_git == repo_git).scalar_subquery())
+            .values(facade_status=CollectionState.SUCCESS.value,facade_data_last_collected=s.func.now(),facade_task_id=None)
+            #The session holds no loaded instances and the ORM can't evaluate
+            #a subquery criteria in python anyway, so skip synchronization.
+            .execution_options(synchronize_session=False)
+        )
+
+        result = session.execute(update_stmt)
         session.commit()
 
+        if result.rowcount == 0:
+            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
+
 @celery.task
 def ml_task_success_util(repo_git):
     from augur.tasks.init.celery_app import engine
@@ -289,18 +320,19 @@ def ml_task_success_util(repo_git):
 
     with DatabaseSession(logger, engine) as session:
 
-        repo = Repo.get_by_repo_git(session, repo_git)
-        if not repo:
-            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
-
-        collection_status = repo.collection_status[0]
-
-        collection_status.ml_status = CollectionState.SUCCESS.value
-        collection_status.ml_data_last_collected = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        collection_status.ml_task_id = None
+        update_stmt = (
+            update(CollectionStatus)
+            .where(CollectionStatus.repo_id == s.select(Repo.repo_id).where(Repo.repo_git == repo_git).scalar_subquery())
+            .values(ml_status=CollectionState.SUCCESS.value,ml_data_last_collected=s.func.now(),ml_task_id=None)
+            .execution_options(synchronize_session=False)
+        )
 
+        result = session.execute(update_stmt)
         session.commit()
 
+        if result.rowcount == 0:
+            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
+
 
 
 @celery.task
@@ -314,17 +346,19 @@ def facade_clone_success_util(repo_git):
 
     with DatabaseSession(logger, engine) as session:
 
-        repo = Repo.get_by_repo_git(session, repo_git)
-        if not repo:
-            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
-
-        collection_status = repo.collection_status[0]
-
-        collection_status.facade_status = CollectionState.UPDATE.value
-        collection_status.facade_task_id = None
+        update_stmt = (
+            update(CollectionStatus)
+            .where(CollectionStatus.repo_id == s.select(Repo.repo_id).where(Repo.repo_git == repo_git).scalar_subquery())
+            .values(facade_status=CollectionState.UPDATE.value,facade_task_id=None)
+            .execution_options(synchronize_session=False)
+        )
 
+        result = session.execute(update_stmt)
         session.commit()
 
+        if result.rowcount == 0:
+            raise Exception(f"Task with repo_git of {repo_git} but could not be found in Repo table")
+
 
 class AugurCollectionTotalRepoWeight:
     """
@@ -368,6 +402,10 @@ class AugurCollectionTotalRepoWeight:
         return self
 
 
+#How many (repo_id, task_id) pairs to accumulate before flushing the
+#collection status fields in one executemany UPDATE.
+UPDATE_BATCH_SIZE = 500
+
 class AugurTaskRoutine:
     """
         class to keep track of various groups of collection tasks for a group of repos.
@@ -385,23 +423,35 @@ class AugurTaskRoutine:
     def __init__(self,session,repos: List[str]=[],collection_phases: List=[],collection_hook: str="core"):
         self.logger = session.logger
         #self.session = TaskSession(self.logger)
-        self.collection_phases = collection_phases
+        #Freeze the phase list at construction: it is iterated once per repo
+        #in send_messages and must not alias the caller's (possibly shared
+        #default) list, and a tuple keeps that per-repo iteration cheap.
+        self.collection_phases = tuple(collection_phases)
         #self.disabled_collection_tasks = disabled_collection_tasks
-        self.repos = repos
+        self.repos = list(repos)
         self.session = session
         self.collection_hook = collection_hook
 
         #Also have attribute to determine what to set repos' status as when they are run
         self.start_state = CollectionState.COLLECTING.value
 
-    def update_status_and_id(self,repo_git, task_id):
-        repo = self.session.query(Repo).filter(Repo.repo_git == repo_git).one()
-
-        #Set status in database to collecting
-        repoStatus = repo.collection_status[0]
-        #
-        setattr(repoStatus,f"{self.collection_hook}_task_id",task_id)
-        setattr(repoStatus,f"{self.collection_hook}_status",self.start_state)
+    def update_status_and_id_batch(self, batch):
+
+        #Set status in database to collecting for a whole batch of repos with
+        #one parameterized UPDATE instead of one statement and commit per repo.
+        update_stmt = (
+            update(CollectionStatus)
+            .where(CollectionStatus.repo_id == s.bindparam("b_repo_id"))
+            .values({
+                f"{self.collection_hook}_task_id": s.bindparam("b_task_id"),
+                f"{self.collection_hook}_status": self.start_state
+            })
+            #No loaded instances to synchronize, and the ORM can't evaluate
+            #a bindparam criteria in python for the executemany case.
+            .execution_options(synchronize_session=False)
+        )
+
+        self.session.execute(update_stmt, [{"b_repo_id": repo_id, "b_task_id": task_id} for repo_id, task_id in batch])
         self.session.commit()
 
     def start_data_collection(self):
@@ -413,34 +463,49 @@ class AugurTaskRoutine:
             is generalized.
         """
 
-        #Send messages starts each repo and yields its running info
-        #to concurrently update the correct field in the database.
-        for repo_git, task_id in self.send_messages():
-            self.update_status_and_id(repo_git,task_id)
+        #Send messages starts each repo and yields batches of running info
+        #to update the correct fields in the database in bulk.
+        for batch in self.send_messages():
+            self.update_status_and_id_batch(batch)
     
     def send_messages(self):
-        augur_collection_list = []
-        
-        for repo_git in self.repos:
 
-            #repo = self.session.query(Repo).filter(Repo.repo_git == repo_git).one()
-            #repo_id = repo.repo_id
+        #Only these two columns are needed, so fetch plain (repo_git, repo_id)
+        #tuples rather than Repo instances. The result has to be materialized
+        #up front: the caller commits the status updates on this same session
+        #mid-iteration, which would kill a streaming server-side cursor.
+        rows = self.session.execute(s.select(Repo.repo_git, Repo.repo_id).where(Repo.repo_git.in_(self.repos))).all()
+
+        #The phase list is fixed for the whole block of repos, so bind it once
+        #outside the loop. The phases themselves are factories that bind
+        #repo_git deep inside nested groups, so each one still has to be
+        #called per repo rather than cloned from a template canvas.
+        collection_phases = self.collection_phases
+
+        batch = []
 
-            augur_collection_sequence = []
-            for job in self.collection_phases:
-                #Add the phase to the sequence in order as a celery task.
-                #The preliminary task creates the larger task chain 
-                augur_collection_sequence.append(job(repo_git))
+        for repo_git, repo_id in rows:
+
+            #Add each phase to the sequence in order as a celery task.
+            #The preliminary task creates the larger task chain
+            augur_collection_sequence = [job(repo_git) for job in collection_phases]
 
-            #augur_collection_sequence.append(core_task_success_util.si(repo_git))
             #Link all phases in a chain and send to celery
             augur_collection_chain = chain(*augur_collection_sequence)
             task_id = augur_collection_chain.apply_async().task_id
 
             self.logger.info(f"Setting repo {self.collection_hook} status to collecting for repo: {repo_git}")
 
-            #yield the value of the task_id to the calling method so that the proper collectionStatus field can be updated
-            yield repo_git, task_id
+            #Accumulate the (repo_id, task_id) pairs so the calling method can
+            #update the proper collectionStatus fields for the whole batch at once.
+            batch.append((repo_id, task_id))
+
+            if len(batch) >= UPDATE_BATCH_SIZE:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
 
 def start_block_of_repos(logger,session,repo_git_identifiers,phases,repos_type,hook="core"):
 
@@ -492,8 +557,11 @@ def start_repos_by_user(session, max_repo,phase_list, days_until_collect_again =
 
     #getattr(CollectionStatus,f"{hook}_status" ) represents the status of the given hook
     #Get the count of repos that are currently running this collection hook
+    #with a server-side count instead of materializing every row.
     status_column = f"{hook}_status"
-    active_repo_count = len(session.query(CollectionStatus).filter(getattr(CollectionStatus,status_column ) == CollectionState.COLLECTING.value).all())
+    active_repo_count = session.execute(
+        s.select(s.func.count()).select_from(CollectionStatus).where(getattr(CollectionStatus,status_column ) == CollectionState.COLLECTING.value)
+    ).scalar()
 
     #Will always disallow errored repos and repos that are already collecting
 
@@ -1,4 +1,5 @@
 import logging
+import numpy as np
 import pytest
 import sqlalchemy as s
 
@@ -29,4 +30,13 @@ def test_remove_duplicates_by_uniques(test_db_engine):
 
 
 
-    
\ No newline at end of file
+    
+def test_date_weight_factors_matches_scalar():
+
+    days = list(range(0, 61, 5))
+
+    expected = [date_weight_factor(day) for day in days]
+    assert date_weight_factors(np.array(days)).tolist() == expected
+
+    shifted_expected = [date_weight_factor(day, domain_shift=30) for day in days]
+    assert date_weight_factors(np.array(days), domain_shift=30).tolist() == shifted_expected